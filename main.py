@@ -7,7 +7,9 @@ import logging
 import logging.config
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from typing import Any, Callable
 
 import yaml
 import humanize
@@ -49,39 +51,41 @@ def sync(args):
     auth = (args.username, args.password)
     api_root = args.api_root
 
-    academic_years = managers.AcademicYearManager(api_root, auth)
-    grades = managers.GradeManager(api_root, auth)
-    dorms = managers.DormManager(api_root, auth)
-    detention_offenses = managers.DetentionOffenseManager(api_root, auth)
-    detention_codes = managers.DetentionCodeManager(api_root, auth)
+    # Settings every manager takes
+    options = {
+        'cache_dir': args.cache_dir,
+        'max_workers': args.max_workers,
+    }
+
+    academic_years = managers.AcademicYearManager(api_root, auth, **options)
+    grades = managers.GradeManager(api_root, auth, **options)
+    dorms = managers.DormManager(api_root, auth, **options)
+    detention_offenses = managers.DetentionOffenseManager(api_root, auth, **options)
+    detention_codes = managers.DetentionCodeManager(api_root, auth, **options)
 
     parents = managers.ParentManager(
         api_root,
         auth=auth,
-        ks_filename=args.families_file)
-
-    parents.sync()
+        ks_filename=args.families_file,
+        **options)
 
     students = managers.StudentManager(
         api_root,
         auth=auth,
-        ks_filename=args.student_file)
-
-    students.sync()
+        ks_filename=args.student_file,
+        **options)
 
     teachers = managers.TeacherManager(
         api_root,
         auth=auth,
-        ks_filename=args.teacher_file)
-
-    teachers.sync()
+        ks_filename=args.teacher_file,
+        **options)
 
     courses = managers.CourseManager(
         api_root,
         auth=auth,
-        ks_filename=args.course_file)
-
-    courses.sync()
+        ks_filename=args.course_file,
+        **options)
 
     sections = managers.SectionManager(
         api_root,
@@ -89,9 +93,8 @@ def sync(args):
         ks_filename=args.section_file,
         academic_year_manager=academic_years,
         teacher_manager=teachers,
-        course_manager=courses)
-
-    sections.sync()
+        course_manager=courses,
+        **options)
 
     student_registrations = managers.StudentRegistrationManager(
         api_root,
@@ -99,9 +102,8 @@ def sync(args):
         ks_filename=args.student_registration_file,
         academic_year_manager=academic_years,
         section_manager=sections,
-        student_manager=students)
-
-    student_registrations.sync()
+        student_manager=students,
+        **options)
 
     enrollments = managers.EnrollmentManager(
         api_root,
@@ -111,9 +113,8 @@ def sync(args):
         grade_manager=grades,
         student_manager=students,
         teacher_manager=teachers,
-        dorm_manager=dorms)
-
-    enrollments.sync()
+        dorm_manager=dorms,
+        **options)
 
     detentions = managers.DetentionManager(
         api_root,
@@ -123,9 +124,36 @@ def sync(args):
         offense_manager=detention_offenses,
         code_manager=detention_codes,
         student_manager=students,
-        teacher_manager=teachers)
+        teacher_manager=teachers,
+        **options)
+
+    # The lookup tables and base records don't depend on each other
+    run_concurrently(
+        academic_years.load_apps_data,
+        grades.load_apps_data,
+        dorms.load_apps_data,
+        detention_offenses.load_apps_data,
+        detention_codes.load_apps_data,
+        parents.sync,
+        students.sync,
+        teachers.sync,
+        courses.sync)
+
+    sections.sync()
+
+    # Everything else only needs records that are synced by now
+    run_concurrently(
+        student_registrations.sync,
+        enrollments.sync,
+        detentions.sync)
 
-    detentions.sync()
+
+def run_concurrently(*tasks: Callable[[], Any]):
+    """Run independent steps of the sync at the same time, re-raising the first failure"""
+
+    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        for future in as_completed([executor.submit(task) for task in tasks]):
+            future.result()
 
 
 def get_args():
@@ -167,6 +195,11 @@ def get_args():
     parser.add_argument("--username",  default=os.environ.get("USERNAME"))
     parser.add_argument("--password",  default=os.environ.get("PASSWORD"))
     
+    parser.add_argument("--cache-dir", default=os.environ.get("CACHE_DIR"))
+
+    parser.add_argument("--max-workers", type=int,
+                        default=int(os.environ.get("MAX_WORKERS", 32)))
+
     parser.add_argument("--logging-config",
                         default=os.environ.get("LOGGING_CONFIG_FILE",
                                                "logging_default.yml"))
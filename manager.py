@@ -1,30 +1,109 @@
 """Base manager"""
 
 import time
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
 from typing import Any, List, Tuple, Dict, Iterable, Hashable, Callable, Optional
-from functools import cache
+from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
 import json
+import operator
+import os
+import threading
 import urllib.parse
 
 import requests
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
+from urllib3.util.retry import Retry
 import chardet
 
-from single import run_once
 
 log = logging.getLogger(__name__)
 
 
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTP adapter that applies a default timeout to requests that don't set one"""
+
+    def __init__(self, *args, timeout: Any = None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+
+        return super().send(request, **kwargs)
+
+
 class AppsManager:
     url_key: str = None
     key_name: str = None
+    max_workers: int = 32
+
+    # Connect and read timeouts; reads are generous since bulk writes can take a while
+    request_timeout: Tuple[float, float] = (3.05, 60)
+
+    # With a cache directory, apps data is snapshotted between runs and only modified records are fetched
+    cache_dir: str = None
+    modified_field: str = 'modified'
+    modified_since_param: str = 'modified_since'
 
-    def __init__(self, api_root: str, auth: Tuple[str, str]):
+    # Deltas reach back this far before the last load, for edits that were in flight while it ran
+    snapshot_overlap: timedelta = timedelta(minutes=5)
+
+    _sessions: Dict[Tuple[Tuple[str, str], int, Tuple[float, float]], requests.Session] = {}
+
+    def __init__(self, api_root: str, auth: Tuple[str, str], cache_dir: str = None, max_workers: int = None):
         self.api_root = api_root
+
+        if cache_dir is not None:
+            self.cache_dir = cache_dir
+
+        if max_workers is not None:
+            self.max_workers = max_workers
+
         self.apps_data = {}
-        self.session = requests.session()
-        self.session.auth = auth
+        self._url_map = None
+        self._apps_loaded = False
+        self._apps_load_lock = threading.Lock()
+        self.session = self.get_session(auth, self.max_workers, self.request_timeout)
+
+        # The fields project() keeps, or None when records are stored whole
+        self._projected_fields = None
+
+        # Server time the last load started at; anything modified after it needs fetching next run
+        self._loaded_as_of: Optional[datetime] = None
+
+        # Apps requests are all network bound, so page prefetches and per-record writes run concurrently
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._apps_data_lock = threading.Lock()
+
+    @classmethod
+    def get_session(cls, auth: Tuple[str, str], pool_size: int,
+                    timeout: Tuple[float, float]) -> requests.Session:
+        """Get the session shared by every manager using the same credentials, pool size and timeout"""
+
+        session_key = (auth, pool_size, timeout)
+
+        if session_key not in cls._sessions:
+            session = requests.session()
+            session.auth = auth
+
+            # One pool for the whole sync caps the connections held against the app server,
+            # and blocking on it makes the managers' workers share those connections.
+            # Connection failures are always retried; gateway errors only for idempotent methods,
+            # so a POST that may have landed is never sent twice
+            retries = Retry(total=5, backoff_factor=0.3, status_forcelist=[502, 503, 504], raise_on_status=False)
+            adapter = TimeoutHTTPAdapter(pool_maxsize=pool_size, pool_block=True, max_retries=retries,
+                                         timeout=timeout)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+
+            cls._sessions[session_key] = session
+
+        return cls._sessions[session_key]
 
     def get_url_for_key(self, key: str) -> Optional[str]:
         """Get the URL for a given key"""
@@ -39,6 +118,14 @@ class AppsManager:
 
         return self.apps_data[key]["url"]
 
+    def get_urls_for_keys(self, keys: Iterable[Hashable]) -> Dict[Hashable, Optional[str]]:
+        """Get the URLs for many keys in one pass, with None for keys that have no record"""
+
+        self.load_apps_data()
+
+        return {key: self.apps_data[key]["url"] if key in self.apps_data else None
+                for key in keys}
+
     def get_key_value(self, record: Dict[str, Any]) -> Hashable:
         """Get the key to use for a given record"""
 
@@ -50,45 +137,185 @@ class AppsManager:
 
         return record[self.key_name]
 
-    @cache
     def get_url_map(self) -> Dict[str, str]:
-        for i in range(10):
-            try:
-                resp = self.session.get(self.api_root)
-                resp.raise_for_status()
-                return resp.json()
-            except requests.ConnectionError:
-                log.error("Connection error when getting URL map")
-                time.sleep(5)
-
-    @run_once
+        if self._url_map is None:
+            # Connection errors are retried with backoff by the session's adapter
+            resp = self.session.get(self.api_root)
+            resp.raise_for_status()
+            self._url_map = resp.json()
+
+        return self._url_map
+
     def load_apps_data(self):
-        url = self.url
+        """Load the apps records, once"""
+
+        if self._apps_loaded:
+            return
+
+        # Other managers' worker threads can be the first to look something up here
+        with self._apps_load_lock:
+            if not self._apps_loaded:
+                self._load_apps_data()
+                self._apps_loaded = True
+
+    def _load_apps_data(self):
+        log.info("Beginning apps data load from %s", self.url)
+
+        snapshot_as_of = self.read_snapshot()
+
+        if snapshot_as_of:
+            modified_since = (snapshot_as_of - self.snapshot_overlap).isoformat()
+            loaded, server_time = self.load_pages({self.modified_since_param: modified_since})
+            record_count = self.get_record_count()
+
+            # Deleted records never come back as modified, so the snapshot is only good if nothing was deleted
+            if len(self.apps_data) != record_count:
+                if len(loaded) == record_count:
+                    # Every record came back anyway (the server ignores the filter), so just drop the rest
+                    log.info("Dropping records deleted from %s since the snapshot", self.url_key)
+                    for key in set(self.apps_data) - set(loaded):
+                        del self.apps_data[key]
+                else:
+                    log.info("Snapshot for %s is out of date, reloading all records", self.url_key)
+                    self.apps_data.clear()
+                    loaded, server_time = self.load_pages()
+        else:
+            loaded, server_time = self.load_pages()
+
+        # Never anything newer than the load itself: our own writes come later, and would hide edits made meanwhile
+        self._loaded_as_of = server_time or self.newest_modified(loaded) or snapshot_as_of
+
+        log.info("Finished loading from %s, got %d records",
+                 self.url, len(self.apps_data))
+
+    def load_pages(self, params: Dict[str, Any] = None) -> Tuple[List[Hashable], Optional[datetime]]:
+        """Load every page of the list endpoint into apps_data.
 
-        log.info("Beginning apps data load from %s", url)
+        Returns the keys loaded and the server's time when the first page was served, if it said"""
 
-        url_parts = list(urllib.parse.urlparse(url))
+        url_parts = list(urllib.parse.urlparse(self.url))
         query = dict(urllib.parse.parse_qsl(url_parts[4]))
         query.update({'page_size': 5000})
+        query.update(params or {})
         url_parts[4] = urllib.parse.urlencode(query)
         url = urllib.parse.urlunparse(url_parts)
 
-        while url:
-            log.debug("Loading %s, %d records already loaded",
-                      url, len(self.apps_data))
+        log.debug("Loading %s", url)
+        future = self._executor.submit(self.session.get, url)
+        page_count = 0
+        loaded = []
+        server_time = None
 
-            resp = self.session.get(url)
+        while future:
+            resp = future.result()
             data = resp.json()
+
+            if page_count == 0:
+                server_time = parse_http_date(resp.headers.get('Date'))
             url = data["next"]
+            page_count += 1
+
+            # Fetch the next page while this one is being stored
+            future = None
+            if url:
+                if page_count % 10 == 0:
+                    log.debug("Loading %s, %d pages and %d records already loaded",
+                              url, page_count, len(self.apps_data))
+
+                future = self._executor.submit(self.session.get, url)
 
             for record in data["results"]:
                 key = self.get_key_value(record)
 
-                # We're only storing the URLs here
-                self.apps_data[key] = record
+                self.apps_data[key] = self.project(record)
+                loaded.append(key)
 
-        log.info("Finished loading from %s, got %d records",
-                 self.url, len(self.apps_data))
+        return loaded, server_time
+
+    def newest_modified(self, keys: Iterable[Hashable]) -> Optional[datetime]:
+        """The latest modification time among the given records"""
+
+        times = [parse_timestamp(self.apps_data[key].get(self.modified_field)) for key in keys]
+        times = [stamp for stamp in times if stamp]
+
+        return max(times, default=None)
+
+    def get_record_count(self) -> Optional[int]:
+        """Get the number of records the apps system currently has"""
+
+        resp = self.session.get(self.url, params={'page_size': 1})
+        resp.raise_for_status()
+
+        return resp.json().get('count')
+
+    @property
+    def snapshot_path(self) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+
+        return os.path.join(self.cache_dir, f"{self.url_key}.json")
+
+    def read_snapshot(self) -> Optional[datetime]:
+        """Fill apps_data from the last run's snapshot, returning the server time it is current to"""
+
+        path = self.snapshot_path
+
+        if not path or not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, encoding='utf-8') as f_in:
+                snapshot = json.load(f_in)
+
+            # Records are stored projected, so a snapshot taken with a different field map is missing fields
+            if snapshot.get("fields") != self._projected_fields:
+                log.info("Snapshot %s was taken with different fields, doing a full load", path)
+                return None
+
+            fields = self._projected_fields or []
+
+            for record in snapshot["records"]:
+                missing = [name for name in fields if name not in record]
+                if missing:
+                    raise ValueError(f"record is missing {', '.join(missing)}")
+
+                self.apps_data[self.get_key_value(record)] = record
+
+            as_of = parse_timestamp(snapshot["loaded_as_of"])
+            if not as_of:
+                raise ValueError("no load time")
+
+            return as_of
+        except (ValueError, KeyError, InvalidRecord) as exc:
+            log.warning("Ignoring unreadable snapshot %s: %s", path, exc)
+            self.apps_data.clear()
+            return None
+
+    def write_snapshot(self):
+        """Save apps_data for the next run, if every record says when it was last modified"""
+
+        path = self.snapshot_path
+
+        if not path or not self._loaded_as_of:
+            return
+
+        modified = [record.get(self.modified_field) for record in self.apps_data.values()]
+
+        if not modified or not all(modified):
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        with open(path + ".tmp", 'w', encoding='utf-8') as f_out:
+            json.dump({'loaded_as_of': self._loaded_as_of.isoformat(), 'fields': self._projected_fields,
+                       'records': list(self.apps_data.values())}, f_out)
+
+        os.replace(path + ".tmp", path)
+
+    def project(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Cut an apps record down to what the sync looks at before storing it"""
+
+        return record
 
     @property
     def url(self) -> str:
@@ -100,236 +327,494 @@ class SyncManager(AppsManager):
     field_translations: Dict[str, Callable[[Any], Any]] = {}
     required_fields: List[str] = []
 
-    def __init__(self, api_root: str, auth: Tuple[str, str], ks_filename: str = None):
-        super().__init__(api_root=api_root, auth=auth)
+    # URL map key of an endpoint taking lists of records; managers without one go record by record
+    bulk_url_key: str = None
+    # URL map key of an endpoint deleting the records POSTed to it as {"ids": [record URLs]}
+    bulk_delete_url_key: str = None
+    bulk_batch_size: int = 500
+
+    def __init__(self, api_root: str, auth: Tuple[str, str], ks_filename: str = None, **kwargs):
+        super().__init__(api_root=api_root, auth=auth, **kwargs)
         self.ks_filename = ks_filename
         self.ks_data = {}
+        self._ks_loaded = False
 
-    def get_url_for_key(self, key: str) -> str:
-        self.create()
-
-        return super().get_url_for_key(key)
+        # Pulls the mapped fields out of a record as one tuple, so a whole record compares in one go
+        self._compare_fields = None
+        if self.field_map:
+            self._compare_fields = operator.itemgetter(*(apps_attr for apps_attr, _ in self.field_map))
+            self._projected_fields = ['url', self.modified_field] + [apps_attr for apps_attr, _ in self.field_map]
 
-    @run_once
     def load_ks_data(self) -> Dict[str, dict]:
+        if self._ks_loaded:
+            return
+
         log.info("Beginning Keystone data load from %s", self.ks_filename)
 
         skip_count = 0
 
         with open(self.ks_filename, 'rb') as f_in:
-            encoding = chardet.detect(f_in.read())['encoding']
-            log.debug("Encoding is '%s'", encoding)
+            raw = f_in.read()
 
-        with open(self.ks_filename, encoding=encoding) as f_in:
-            data = json.load(f_in)
+        encoding = chardet.detect(raw)['encoding']
+        log.debug("Encoding is '%s'", encoding)
 
-            for i, record in enumerate(data["records"]):
-                try:
-                    for j, translated in enumerate(self.split(record)):
-                        try:
-                            key = self.get_key_value(translated)
+        # Only the record list is needed, so let go of the file contents before translating
+        records = json.loads(raw.decode(encoding))["records"]
+        del raw
 
-                            self.ks_data[key] = translated
-                        except InvalidRecord as exc:
-                            skip_count += 1
-                            log.debug("Unable to load Keystone record %d subrecord %d: %s (%s)", i, j, exc, exc.record)
+        self.prefetch(records)
 
-                except InvalidRecord as exc:
-                    skip_count += 1
-                    log.debug("Unable to load Keystone record %d: %s (%s)", i, exc, exc.record)
+        for i, record in enumerate(records):
+            try:
+                for j, translated in enumerate(self.split(record)):
+                    try:
+                        key = self.get_key_value(translated)
+
+                        self.ks_data[key] = translated
+                    except InvalidRecord as exc:
+                        skip_count += 1
+                        log.debug("Unable to load Keystone record %d subrecord %d: %s (%s)", i, j, exc, exc.record)
+
+            except InvalidRecord as exc:
+                skip_count += 1
+                log.debug("Unable to load Keystone record %d: %s (%s)", i, exc, exc.record)
 
         if skip_count:
             log.error("Encountered errors and skipped %s records when loading Keystone data from %s",
                       skip_count, self.ks_filename)
 
-    @run_once
-    def delete(self):
-        self.load_apps_data()
+        self._ks_loaded = True
+
+    def _ensure_loaded(self):
+        """Load the Keystone and apps data, once"""
+
         self.load_ks_data()
+        self.load_apps_data()
+
+    def delete(self):
+        self._ensure_loaded()
 
-        to_delete = self.apps_data.keys() - self.ks_data.keys()
+        to_delete = [key for key in self.apps_data if key not in self.ks_data]
 
         if not to_delete:
-            log.info("No records to delete")
+            log.info("No records to delete under %s", self.url_key)
             return
 
         log.info("Deleting %d records under %s", len(to_delete), self.url_key)
+        started_at = time.monotonic()
 
-        for key in tqdm(to_delete):
-            record = self.apps_data[key]
-            url = record["url"]
+        # A stable order keeps runs comparable and the debug log grouped
+        to_delete = sorted(to_delete, key=str)
+        delete_count = len(to_delete)
 
-            resp = self.session.delete(url)
-            resp.raise_for_status()
+        if self.bulk_delete_url_key:
+            to_delete = self._bulk_delete(to_delete)
+
+        self.run_each(self._delete_one, to_delete)
+
+        log.info("Deleted %d records under %s in %.2fs",
+                 delete_count, self.url_key, time.monotonic() - started_at)
+
+    def _delete_one(self, key: Hashable):
+        """Delete a single record from the apps system"""
+
+        url = self.apps_data[key]["url"]
+
+        resp = self.session.delete(url)
+        resp.raise_for_status()
+
+        if log.isEnabledFor(logging.DEBUG):
             log.debug("Deleted %s", url)
 
-    @run_once
+        with self._apps_data_lock:
+            del self.apps_data[key]
+
     def create(self):
-        self.load_apps_data()
-        self.load_ks_data()
+        self._ensure_loaded()
 
-        to_create = self.ks_data.keys() - self.apps_data.keys()
+        to_create = [key for key in self.ks_data if key not in self.apps_data]
 
         if not to_create:
-            log.info("No records to create")
+            log.info("No records to create under %s", self.url_key)
             return
 
         log.info("Creating %d new records under %s",
                  len(to_create), self.url_key)
+        started_at = time.monotonic()
 
-        error_count = 0
+        to_create = sorted(to_create, key=str)
+        create_count = len(to_create)
 
-        for key in tqdm(to_create):
-            desired_record = self.ks_data[key]
-            resp = self.session.post(self.url, json=desired_record)
-            data = resp.json()
+        if self.bulk_url_key:
+            to_create = self._bulk("POST", to_create, lambda key: self.ks_data[key])
 
-            if resp.status_code >= 400 and resp.status_code < 500:
-                error_count += 1
-                log.debug(
-                    "Unexpected status code when creating %s: %s", key, resp.status_code)
-                for attr, errors in data.items():
-                    if attr == 'detail' and isinstance(errors, str):
-                        log.debug("Error when creating %s: %s", key, errors)
-                    else:
-                        for error in errors:
-                            log.debug("Error when creating %s on field %s: '%s'. Original value was '%s'",
-                                      key, attr, error, desired_record[attr])
+        results = self.run_each(self._create_one, to_create)
+        error_count = results.count(False)
 
-                continue
+        if error_count:
+            log.error("Encoutered %d errors when creating records in app system", error_count)
 
-            resp.raise_for_status()
+        log.info("Created %d records under %s in %.2fs",
+                 create_count - error_count, self.url_key, time.monotonic() - started_at)
+
+    def _create_one(self, key: Hashable) -> bool:
+        """Create a single record in the apps system, returning False if it was rejected"""
+
+        desired_record = self.ks_data[key]
+        resp = self.session.post(self.url, json=desired_record)
+
+        if resp.status_code >= 400 and resp.status_code < 500:
+            self.log_rejection("creating", key, resp, desired_record)
+            return False
+
+        resp.raise_for_status()
+        data = resp.json()
+
+        if log.isEnabledFor(logging.DEBUG):
             log.debug("Created %s at %s: %d", key,
                       data["url"], resp.status_code)
-            self.apps_data[key] = data
 
-        if error_count:
-            log.error("Encoutered %d errors when creating records in app system", error_count)
+        with self._apps_data_lock:
+            self.apps_data[key] = self.project(data)
 
-        log.info("Record creation finished")
+        return True
 
-    @run_once
     def update(self):
-        self.load_apps_data()
-        self.load_ks_data()
-
-        update_candidates = self.ks_data.keys() & self.apps_data.keys()
-
-        to_update = set()
+        self._ensure_loaded()
 
-        for key in update_candidates:
-            current_record = self.apps_data[key]
-            desired_record = self.ks_data[key]
+        apps_data = self.apps_data
+        needs_update = self.needs_update
 
-            if should_update(desired_record, current_record):
-                to_update.add(key)
+        to_update = [key for key, desired_record in self.ks_data.items()
+                     if key in apps_data and needs_update(desired_record, apps_data[key])]
 
         if not to_update:
-            log.info("No records to update")
+            log.info("No records to update under %s", self.url_key)
             return
 
         log.info("Updating %d records under %s", len(to_update), self.url_key)
-        error_count = 0
+        started_at = time.monotonic()
+
+        to_update = sorted(to_update, key=str)
+        update_count = len(to_update)
+
+        if self.bulk_url_key:
+            to_update = self._bulk("PATCH", to_update,
+                                   lambda key: dict(self.ks_data[key], url=self.apps_data[key]["url"]))
+
+        results = self.run_each(self._update_one, to_update)
+        error_count = results.count(False)
+
+        if error_count:
+            log.error("Encoutered %d errors when updating Apps system", error_count)
+
+        log.info("Updated %d records under %s in %.2fs",
+                 update_count - error_count, self.url_key, time.monotonic() - started_at)
+
+    def _update_one(self, key: Hashable) -> bool:
+        """Update a single record in the apps system, returning False if it was rejected"""
+
+        desired_record = self.ks_data[key]
+        current_record = self.apps_data[key]
+        url = current_record["url"]
+        resp = self.session.put(url, json=desired_record)
+
+        if resp.status_code >= 400 and resp.status_code < 500:
+            self.log_rejection("updating", url, resp, desired_record)
+            return False
+
+        resp.raise_for_status()
+
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Updated %s", url)
+
+        with self._apps_data_lock:
+            self.apps_data[key] = self.project(resp.json())
+
+        return True
+
+    def run_each(self, func: Callable[[Hashable], Any], keys: List[Hashable]) -> List[Any]:
+        """Run func for every key on the executor, advancing the progress bar as each one finishes"""
+
+        futures = [self._executor.submit(func, key) for key in keys]
+        results = []
+
+        try:
+            # Redrawing twice a second is plenty for a progress bar and keeps tqdm out of the hot loop
+            for future in tqdm(as_completed(futures), total=len(futures), mininterval=0.5):
+                results.append(future.result())
+        except BaseException:
+            # Don't keep hammering the apps system once one request has failed hard
+            for future in futures:
+                future.cancel()
+            raise
+
+        return results
+
+    def log_rejection(self, action: str, name: Any, resp: requests.Response, desired_record: Dict[str, Any]):
+        """Log why the apps system rejected a record"""
+
+        log.debug("Unexpected status code when %s %s: %s", action, name, resp.status_code)
+
+        try:
+            data = resp.json()
+        except ValueError:
+            # Not a DRF validation error, likely an error page from in front of the app
+            log.debug("Non-JSON error body when %s %s", action, name)
+            return
+
+        if not isinstance(data, dict):
+            log.debug("Error when %s %s: %s", action, name, data)
+            return
 
-        for key in tqdm(to_update):
-            desired_record = self.ks_data[key]
-            current_record = self.apps_data[key]
-            url = current_record["url"]
-            resp = self.session.put(url, json=desired_record)
+        for attr, errors in data.items():
+            if attr == 'detail' and isinstance(errors, str):
+                log.debug("Error when %s %s: %s", action, name, errors)
+            else:
+                for error in errors:
+                    log.debug("Error when %s %s on field %s: '%s'. Desired value was '%s'",
+                              action, name, attr, error, desired_record.get(attr))
+
+    def _bulk(self, method: str, keys: List[Hashable],
+              get_body: Callable[[Hashable], Any]) -> List[Hashable]:
+        """Send records to the bulk endpoint in batches.
+
+        Returns the keys that still need to be sent one at a time: any batch the server
+        rejected, and everything left over if the server doesn't allow the method in bulk"""
+
+        url = self.get_url_map()[self.bulk_url_key]
+        remaining = []
+
+        for start in range(0, len(keys), self.bulk_batch_size):
+            batch = keys[start:start + self.bulk_batch_size]
+            resp = self.session.request(method, url, json=[get_body(key) for key in batch])
+
+            if resp.status_code == 405:
+                log.info("Bulk %s not allowed at %s, falling back to single records", method, url)
+                return remaining + keys[start:]
 
             if resp.status_code >= 400 and resp.status_code < 500:
-                error_count += 1
-                data = resp.json()
-
-                log.debug("Unexpected status code when updating %s: %s", url, resp.status_code)
-                for attr, errors in data.items():
-                    if attr == 'detail' and isinstance(errors, str):
-                        log.debug("Error when updating %s: %s", key, errors)
-                    else:
-                        for error in errors:
-                            log.debug("Error when updating %s on field %s: '%s'. Desired value was '%s'",
-                                      url, attr, error, desired_record[attr])
+                # A bulk write fails as a whole, so send this batch individually to find the bad records
+                log.debug("Bulk %s of %d records to %s failed with %s",
+                          method, len(batch), url, resp.status_code)
+                remaining.extend(batch)
+                continue
+
+            resp.raise_for_status()
+            log.debug("Bulk %s of %d records to %s finished", method, len(batch), url)
+
+            # Match the returned records up by key, not position: nothing promises the same order
+            sent = set(batch)
+            returned = set()
+
+            with self._apps_data_lock:
+                for record in resp.json():
+                    record = self.project(record)
+
+                    try:
+                        key = self.get_key_value(record)
+                    except MissingKey as exc:
+                        log.warning("Ignoring record from bulk %s to %s: %s", method, url, exc)
+                        continue
+
+                    if key not in sent:
+                        log.warning("Ignoring unexpected record %s from bulk %s to %s", key, method, url)
+                        continue
+
+                    self.apps_data[key] = record
+                    returned.add(key)
 
+            missing = [key for key in batch if key not in returned]
+            if missing:
+                log.warning("Bulk %s to %s did not return %d of %d records, sending them individually",
+                            method, url, len(missing), len(batch))
+                remaining.extend(missing)
+
+        return remaining
+
+    def _bulk_delete(self, keys: List[Hashable]) -> List[Hashable]:
+        """POST the URLs of records to delete to the bulk delete endpoint in batches.
+
+        Returns the keys that still need to be deleted one at a time, as _bulk does"""
+
+        url = self.get_url_map()[self.bulk_delete_url_key]
+        remaining = []
+
+        for start in range(0, len(keys), self.bulk_batch_size):
+            batch = keys[start:start + self.bulk_batch_size]
+            resp = self.session.post(url, json={"ids": [self.apps_data[key]["url"] for key in batch]})
+
+            if resp.status_code == 405:
+                log.info("Bulk delete not allowed at %s, falling back to single records", url)
+                return remaining + keys[start:]
+
+            if resp.status_code >= 400 and resp.status_code < 500:
+                log.debug("Bulk delete of %d records at %s failed with %s", len(batch), url, resp.status_code)
+                remaining.extend(batch)
                 continue
 
             resp.raise_for_status()
-            log.debug("Updated %s", url)
-        if error_count:
-            log.error("Encoutered %d errors when updating Apps system", error_count)
+            log.debug("Bulk delete of %d records at %s finished", len(batch), url)
+
+            with self._apps_data_lock:
+                for key in batch:
+                    del self.apps_data[key]
+
+        return remaining
+
+    def project(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep only the URL, modification time and mapped fields of records with a field map"""
 
-        log.info("Record updates finished")
+        if not self._projected_fields:
+            return record
+
+        return {name: record[name] for name in self._projected_fields if name in record}
+
+    def needs_update(self, desired: Dict[str, Any], current: Dict[str, Any]) -> bool:
+        """Determine if the apps record differs from the desired record"""
+
+        if self._compare_fields:
+            return self._compare_fields(desired) != self._compare_fields(current)
+
+        return should_update(desired, current)
+
+    def prefetch(self, ks_records: List[Dict[str, Any]]):
+        """Look up anything translation needs for all the Keystone records at once"""
 
     def split(self, ks_record: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
         """Split a single incoming record into one or more translated outgoing records"""
 
         yield self.translate(ks_record)
 
+    @cached_property
+    def _field_plan(self) -> List[Tuple[str, str, Optional[Callable[[Any], Any]]]]:
+        """The field map with each field's translation looked up once.
+
+        Built on first use since most managers only set their translations after __init__"""
+
+        return [(apps_attr, ks_attr, self.field_translations.get(apps_attr))
+                for apps_attr, ks_attr in self.field_map]
+
     def translate(self, ks_record: Dict[str, Any]) -> Dict[str, Any]:
         """Translate a Keystone record into an apps record"""
 
         out = {}
 
-        for apps_attr, ks_attr in self.field_map:
+        for apps_attr, ks_attr, translation in self._field_plan:
             val = ks_record[ks_attr]
 
             if isinstance(val, str):
                 val = val.strip()  # DRF will strip whitespace, so this prevents a needless update
 
-            if apps_attr in self.field_translations:
-                val = self.field_translations[apps_attr](val)
+            if translation:
+                val = translation(val)
 
             out[apps_attr] = val
 
         for key in self.required_fields:
-            if not key in out:
-                raise MissingRequiredValue(out, key)
-
-            if not out[key]:
+            if not out.get(key):
                 raise MissingRequiredValue(out, key)
 
         return out
 
     def sync(self):
-        self.load_ks_data()
-        self.load_apps_data()
+        self._ensure_loaded()
 
         self.delete()
         self.create()
         self.update()
 
+        self.write_snapshot()
+
 
 class GetOrCreateManager(AppsManager):
     """Get or create manager gets URLS for various IDs and such"""
 
+    def __init__(self, api_root: str, auth: Tuple[str, str], **kwargs):
+        super().__init__(api_root, auth, **kwargs)
+
+        # Records here are never deleted, so a resolved URL stays good for the whole run
+        self._url_cache: Dict[Hashable, str] = {}
+
+    def _load_apps_data(self):
+        super()._load_apps_data()
+
+        # There's no sync step to save at, so the snapshot is kept current as records are loaded and created
+        self.write_snapshot()
+
     def get_url_for_key(self, key) -> Optional[str]:
-        self.load_apps_data()
+        if key in self._url_cache:
+            return self._url_cache[key]
 
         if not key:
             return None
 
+        self.load_apps_data()
+
         if key in self.apps_data:
-            return self.apps_data[key]["url"]
+            url = self.apps_data[key]["url"]
+            self._url_cache[key] = url
+            return url
 
-        # We didn't have it - create the record
-        resp = self.session.post(self.url, json={self.key_name: key})
-        resp.raise_for_status()
-        data = resp.json()
+        # Several managers can look up the same new key at once, so only one of them may create it
+        with self._apps_data_lock:
+            if key in self.apps_data:
+                return self.apps_data[key]["url"]
+
+            # We didn't have it - create the record
+            resp = self.session.post(self.url, json={self.key_name: key})
+            resp.raise_for_status()
+            data = resp.json()
+
+            self.apps_data[key] = self.project(data)
+            self._url_cache[key] = data["url"]
 
-        self.apps_data[key] = data
+            # These tables hold a handful of records, so rewriting the snapshot per create is cheap
+            self.write_snapshot()
 
         return data["url"]
 
+    def get_urls_for_keys(self, keys: Iterable[Hashable]) -> Dict[Hashable, Optional[str]]:
+        urls = super().get_urls_for_keys(keys)
 
-def should_update(desired: Dict[str, Any], current: Dict[str, Any]) -> bool:
-    """Determine if a record for a given key should be updated"""
+        for key, url in urls.items():
+            if key and not url:
+                urls[key] = self.get_url_for_key(key)
+
+        return urls
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO 8601 timestamp from the apps system, or None if it isn't one"""
+
+    if not value:
+        return None
+
+    try:
+        # fromisoformat doesn't take a Z suffix until Python 3.11
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        return None
 
-    for attr_name, desired_value in desired.items():
-        current_value = current[attr_name]
 
-        if current_value != desired_value:
-            return True
+def parse_http_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse an HTTP Date header, or None if there isn't a usable one"""
+
+    if not value:
+        return None
+
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def should_update(desired: Dict[str, Any], current: Dict[str, Any]) -> bool:
+    """Determine if a record for a given key should be updated"""
 
-    return False
+    # Items views compare like sets, so this is a C-level subset check that doesn't need hashable values
+    return not desired.items() <= current.items()
 
 
 class InvalidRecord(Exception):
@@ -2,7 +2,8 @@
 
 import logging
 
-from typing import Dict, Iterable, Any, Hashable, Tuple, Optional
+from functools import cached_property, lru_cache
+from typing import Dict, Iterable, Any, Hashable, List, Tuple, Optional
 from manager import AppsManager, SyncManager, GetOrCreateManager, MissingKeyValue, MissingKey
 
 import parsers
@@ -43,7 +44,8 @@ class TeacherManager(SyncManager):
     ]
 
     field_translations = {
-        'active': parsers.BooleanParse(error_value=False, empty_value=False).parse,
+        # Only a handful of distinct values ever show up, so parse each once
+        'active': lru_cache(maxsize=None)(parsers.BooleanParse(error_value=False, empty_value=False).parse),
     }
 
 
@@ -76,39 +78,47 @@ class ParentManager(SyncManager):
         'full_name': 'full',
     }
 
+    parse_email = parsers.EmailParser(error_value='', empty_value='').parse
+
+    @cached_property
+    def _subvalue_columns(self) -> List[Tuple[str, List[Tuple[str, str]]]]:
+        """The Keystone column for each field of each parent, named once rather than per record"""
+
+        return [(prefix, [(apps_attr, prefix + "_" + ks_attr) for apps_attr, ks_attr in self.subvalue_map.items()])
+                for prefix in ('Pa', 'Pb')]
+
     def split(self, ks_record: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
         did_create = False
 
-        for prefix in ('Pa', 'Pb'):
+        # Every parent record of the family carries these
+        family = {
+            'family_id': ks_record['IDFAMILY'],
+            'address': ks_record['P_address_full'].strip(),
+            'phone_home': ks_record["P_phone_H"].strip(),
+        }
+
+        for prefix, columns in self._subvalue_columns:
             out = {}
 
-            for apps_attr, ks_attr in self.subvalue_map.items():
-                value = ks_record[prefix + "_" + ks_attr].strip()
+            for apps_attr, column in columns:
+                value = ks_record[column].strip()
                 if value:
                     out[apps_attr] = value
 
             # We had at least one value in this parent
             if out:
-                out['family_id'] = ks_record['IDFAMILY']
-                out['address'] = ks_record['P_address_full'].strip()
-                out['phone_home'] = ks_record["P_phone_H"].strip()
+                out.update(family)
                 out['parent_id'] = prefix
 
                 if 'email' in out:
-                    parser = parsers.EmailParser(error_value='', empty_value='')
-                    out['email'] = parser.parse(out['email'].strip())
+                    out['email'] = self.parse_email(out['email'])
 
+                did_create = True
                 yield out
 
         if not did_create:
-            # Create a synthetic Pa record
-
-            yield {
-                'family_id': ks_record['IDFAMILY'],
-                'parent_id': 'Pa',
-                'address': ks_record['P_address_full'].strip(),
-                'phone_home': ks_record["P_phone_H"].strip(),
-            }
+            # Neither parent had any details, so create a synthetic Pa record to hold the family's address and home phone
+            yield dict(family, parent_id='Pa')
 
     def get_key_value(self, record: Dict[str, Any]) -> Hashable:
         return (record["family_id"], record["parent_id"])
@@ -160,16 +170,17 @@ class EnrollmentManager(SyncManager):
                  grade_manager: GradeManager,
                  student_manager: StudentManager,
                  teacher_manager: TeacherManager,
-                 dorm_manager: DormManager):
+                 dorm_manager: DormManager,
+                 **kwargs):
 
-        super().__init__(api_root, auth, ks_filename=ks_filename)
+        super().__init__(api_root, auth, ks_filename=ks_filename, **kwargs)
 
         self.field_translations = {
             'grade': grade_manager.get_url_for_key,
             'academic_year': academic_year_manager.get_url_for_key,
             'student': student_manager.get_url_for_key,
             'advisor': teacher_manager.get_url_for_key,
-            'boarder': parsers.BoarderDayParser(error_value=False, empty_value=False).parse,
+            'boarder': lru_cache(maxsize=None)(parsers.BoarderDayParser(error_value=False, empty_value=False).parse),
             'dorm': dorm_manager.get_url_for_key,
         }
 
@@ -195,9 +206,10 @@ class SectionManager(SyncManager):
                  ks_filename: str,
                  academic_year_manager: AcademicYearManager,
                  teacher_manager: TeacherManager,
-                 course_manager: CourseManager):
+                 course_manager: CourseManager,
+                 **kwargs):
 
-        super().__init__(api_root, auth, ks_filename=ks_filename)
+        super().__init__(api_root, auth, ks_filename=ks_filename, **kwargs)
 
         self.field_translations = {
             'teacher': teacher_manager.get_url_for_key,
@@ -247,9 +259,10 @@ class DetentionManager(SyncManager):
                  student_manager: StudentManager,
                  teacher_manager: TeacherManager,
                  offense_manager: DetentionOffenseManager,
-                 code_manager: DetentionCodeManager):
+                 code_manager: DetentionCodeManager,
+                 **kwargs):
 
-        super().__init__(api_root, auth, ks_filename=ks_filename)
+        super().__init__(api_root, auth, ks_filename=ks_filename, **kwargs)
 
         self.field_translations = {
             'academic_year': academic_year_manager.get_url_for_key,
@@ -272,13 +285,39 @@ class StudentRegistrationManager(SyncManager):
                  academic_year_manager: AcademicYearManager,
                  section_manager: SectionManager,
                  student_manager: StudentManager,
-                 ):
-        super().__init__(api_root, auth, ks_filename=ks_filename)
+                 **kwargs):
+        super().__init__(api_root, auth, ks_filename=ks_filename, **kwargs)
 
         self.academic_year_manager = academic_year_manager
         self.section_manager = section_manager
         self.student_manager = student_manager
 
+        self.academic_year_urls = {}
+        self.section_urls = {}
+        self.student_urls = {}
+
+    def prefetch(self, ks_records: List[Dict[str, Any]]):
+        """Resolve every year, section and student the registrations refer to in one pass each"""
+
+        self.academic_year_urls = self.academic_year_manager.get_urls_for_keys(
+            {record.get('AcademicYear') for record in ks_records})
+
+        self.section_urls = self.section_manager.get_urls_for_keys(
+            {self.get_section_key(record) for record in ks_records})
+
+        self.student_urls = self.student_manager.get_urls_for_keys(
+            {record.get('IDStudent') for record in ks_records})
+
+    def get_section_key(self, ks_record: Dict[str, Any]) -> Hashable:
+        """Get the section manager's key for the section a registration is in"""
+
+        section_lookup_record = {
+            'academic_year': self.academic_year_urls.get(ks_record.get('AcademicYear')),
+            'csn': ks_record.get('CSN')
+        }
+
+        return self.section_manager.get_key_value(section_lookup_record)
+
     def translate(self, ks_record: Dict[str, Any]) -> Dict[str, Any]:
         """Overriding translate to get a multi-get section out of academic year and CSN"""
 
@@ -288,19 +327,14 @@ class StudentRegistrationManager(SyncManager):
         if not ks_record['IDSTUDENTREG']:
             raise MissingKeyValue(ks_record, 'IDSTUDENTREG')
 
-        section_lookup_record = {
-            'academic_year': self.academic_year_manager.get_url_for_key(ks_record['AcademicYear']),
-            'csn': ks_record['CSN']
-        }
-
-        section_key = self.section_manager.get_key_value(section_lookup_record)
+        section_key = self.get_section_key(ks_record)
 
-        section = self.section_manager.get_url_for_key(section_key)
+        section = self.section_urls.get(section_key)
         if not section:
             log.debug("Unable to find section for key %s", section_key)
             raise MissingKeyValue(ks_record, 'section')
 
-        student = self.student_manager.get_url_for_key(ks_record['IDStudent'])
+        student = self.student_urls.get(ks_record['IDStudent'])
         if not student:
             log.debug("Unable to find student for %s", ks_record['IDStudent'])
             raise MissingKeyValue(ks_record, 'student')
@@ -2,7 +2,8 @@
 
 import logging
 
-from typing import Any
+from functools import lru_cache
+from typing import Any, Tuple
 from abc import ABC, abstractmethod
 import re
 
@@ -11,6 +12,8 @@ log = logging.getLogger(__name__)
 class Parser(ABC):
     """Base parser that configures failure modes"""
 
+    __slots__ = ('error_value', 'empty_value')
+
     def __init__(self, error_value: Any = Exception, empty_value: Any=None):
         self.error_value = error_value
         self.empty_value = empty_value
@@ -25,43 +28,57 @@ class Parser(ABC):
         """Call the transform and handle the errors"""
 
         if val == '' or val == None:
-            if self.empty_value == Exception:
+            if self.empty_value is Exception:
                 raise ValueError('Value was empty')
             
             return self.empty_value
 
+        # Errors go straight to the caller, so there's nothing to catch
+        if self.error_value is Exception:
+            return self.transform(val)
+
         try:
             return self.transform(val)
         except ValueError as exc:
-            log.debug("Could not transform value '%s': %s", val, exc)
-            if self.error_value == Exception:
-                raise exc
-            
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Could not transform value '%s': %s", val, exc)
+
             return self.error_value
 
 class BooleanParse(Parser):
     """Transform a variety of boolean values into a bool"""
 
+    __slots__ = ()
+
+    values = {
+        'yes': True, 'true': True, 't': True, '1': True,
+        'no': False, 'false': False, 'f': False, '0': False,
+    }
+
     def transform(self, val: Any) -> bool:
-        if val == True:
-            return True
-        
-        if val == False:
-            return False
-        
-        if val.lower().strip() in {'yes', 'true', 't', '1'}:
+        if isinstance(val, str):
+            parsed = self.values.get(val.strip().lower())
+
+            if parsed is not None:
+                return parsed
+
+        elif val == True:
             return True
-        
-        if val.lower().strip() in {'no', 'false', 'f', '0'}:
+
+        elif val == False:
             return False
-        
+
         raise ValueError(f"Unknown true/false value: {val}")
 
 class BoarderDayParser(Parser):
     """Transform B/D values into a boolean 'is_boarder'"""
 
+    __slots__ = ()
+
     def transform(self, val: str) -> bool:
-        val = val.strip()
+        # Values are almost always exactly 'B' or 'D', so only strip the ones that aren't
+        if val != 'B' and val != 'D':
+            val = val.strip()
 
         if val == 'B':
             return True
@@ -79,31 +96,32 @@ class BoarderDayParser(Parser):
 class EmailParser(Parser):
     """Email parser"""
 
-    user_regex = re.compile(
-        r"(^[-!#$%&'*+/=?^_`{}|~0-9A-Z]+(\.[-!#$%&'*+/=?^_`{}|~0-9A-Z]+)*\Z"  # dot-atom
-        r'|^"([\001-\010\013\014\016-\037!#-\[\]-\177]|\\[\001-\011\013\014\016-\177])*"\Z)',  # quoted-string
-        re.IGNORECASE)
+    __slots__ = ()
 
-    domain_regex = re.compile(
-        # max length for domain name labels is 63 characters per RFC 1034
-        r'((?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+)(?:[A-Z0-9-]{2,63}(?<!-))\Z',
-        re.IGNORECASE)
+    user_pattern = (
+        r"[-!#$%&'*+/=?^_`{}|~0-9A-Z]+(\.[-!#$%&'*+/=?^_`{}|~0-9A-Z]+)*"  # dot-atom
+        r'|"([\001-\010\013\014\016-\037!#-\[\]-\177]|\\[\001-\011\013\014\016-\177])*"')  # quoted-string
+
+    # max length for domain name labels is 63 characters per RFC 1034
+    domain_pattern = r'((?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+)(?:[A-Z0-9-]{2,63}(?<!-))'
+
+    # Case folding is limited to ASCII, which is all the patterns allow anyway and is much cheaper to match
+    user_regex = re.compile(r'(?:' + user_pattern + r')\Z', re.IGNORECASE | re.ASCII)
+    domain_regex = re.compile(domain_pattern + r'\Z', re.IGNORECASE | re.ASCII)
+
+    # Both parts in one go, for the common case of a valid ASCII address
+    email_regex = re.compile(r'(?:' + user_pattern + r')@' + domain_pattern, re.IGNORECASE | re.ASCII)
 
     def transform(self, val: str) -> Any:
         # Clean up any whitespace
         val = val.strip()
 
-        if '@' not in val:
-            raise ValueError('Email must have at least an "@"')
+        valid, result = validate_email(val)
 
-        # From this part on, we are pretty well a copy/paste from Django's validator
-        # This is so that I can remove my janky Django dependency for email validation
-        user_part, domain_part = val.rsplit('@', 1)
-
-        EmailParser.validate_user_part(user_part)
-        EmailParser.validate_domain_part(domain_part)
+        if not valid:
+            raise ValueError(result)
 
-        return val
+        return result
     
     @staticmethod
     def validate_user_part(user_part):
@@ -114,10 +132,46 @@ class EmailParser(Parser):
 
     @staticmethod
     def validate_domain_part(domain_part):
+        # Internationalized domains are checked in their ASCII form, as Django does
+        if not domain_part.isascii():
+            domain_part = EmailParser.punycode(domain_part)
+
         if not EmailParser.domain_regex.match(domain_part):
             raise ValueError('Domain part of email was not valid')
 
     @staticmethod
     def punycode(domain: str):
         """Return the Punycode of the given domain if it's non-ASCII."""
-        return domain.encode('idna').decode('ascii')
\ No newline at end of file
+
+        # Encoding an ASCII domain is a no-op, but still runs the whole IDNA codec
+        if domain.isascii():
+            return domain
+
+        return domain.encode('idna').decode('ascii')
+
+
+@lru_cache(maxsize=8192)
+def validate_email(val: str) -> Tuple[bool, str]:
+    """Validate a stripped email address, returning (True, address) or (False, error message).
+
+    The same addresses come up over and over (siblings share parents), so results are cached;
+    lru_cache won't cache a raised exception, hence the tuple"""
+
+    if EmailParser.email_regex.fullmatch(val):
+        return True, val
+
+    # Didn't match outright: either invalid, which the part checks explain, or an internationalized domain
+    if '@' not in val:
+        return False, 'Email must have at least an "@"'
+
+    # From this part on, we are pretty well a copy/paste from Django's validator
+    # This is so that I can remove my janky Django dependency for email validation
+    user_part, domain_part = val.rsplit('@', 1)
+
+    try:
+        EmailParser.validate_user_part(user_part)
+        EmailParser.validate_domain_part(domain_part)
+    except ValueError as exc:
+        return False, str(exc)
+
+    return True, val